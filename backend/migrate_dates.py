@@ -0,0 +1,51 @@
+"""One-shot migration: convert string created_at fields to BSON dates.
+
+Older documents were written with datetime.now(timezone.utc).isoformat(),
+storing dates as ISO strings. The API now writes native datetimes (BSON
+Date) so Motor hydrates them without per-row parsing. Run this once
+against an existing database to convert the legacy documents:
+
+    python migrate_dates.py
+"""
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# collection -> date fields stored as ISO strings by older code
+FIELDS = {
+    'users': ['created_at'],
+    'categories': ['created_at'],
+    'product_types': ['created_at'],
+    'products': ['created_at'],
+    'suppliers': ['created_at'],
+    'customers': ['created_at'],
+    'purchase_orders': ['created_at', 'date'],
+    'sales_orders': ['created_at', 'date'],
+    'transactions': ['created_at', 'date'],
+    'inventory': ['last_updated'],
+    'user_sessions': ['expires_at', 'created_at'],
+}
+
+
+def main():
+    client = MongoClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    for name, fields in FIELDS.items():
+        for field in fields:
+            result = db[name].update_many(
+                {field: {'$type': 'string'}},
+                [{'$set': {field: {'$toDate': f'${field}'}}}]
+            )
+            print(f"{name}.{field}: converted {result.modified_count} documents")
+
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
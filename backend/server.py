@@ -1,37 +1,55 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response, Request
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import os
 import logging
+import hashlib
 from pathlib import Path
+from async_lru import alru_cache
+from cachetools import TTLCache
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
+from pymongo import UpdateOne
 import httpx
-from io import BytesIO
+from tempfile import SpooledTemporaryFile
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection. tz_aware keeps hydrated BSON dates offset-aware
+# (UTC) so serialized timestamps carry +00:00 instead of being read as
+# local time by clients.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, tzinfo=timezone.utc)
 db = client[os.environ['DB_NAME']]
 
+# Shared HTTP client: keeps connections (and their TLS sessions) alive
+# across requests instead of handshaking per call
+http_client = httpx.AsyncClient(
+    timeout=10,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+)
+
 # JWT configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24 * 7  # 7 days
 
-# Create the main app
-app = FastAPI()
+# Create the main app. orjson encodes dict/list/datetime payloads in C,
+# several times faster than the stdlib encoder on large list responses.
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 
 logging.basicConfig(level=logging.INFO)
@@ -229,6 +247,20 @@ class ReportQuery(BaseModel):
 
 # ===== AUTH HELPER =====
 
+# In-memory auth cache: a bearer token is reused for its full lifetime, so
+# re-running the HMAC verify + users.find_one on every request is pure overhead.
+# Keyed by SHA-256 of the token; entries carry their own deadline clamped to the
+# token's exp claim so logout/revocation staleness stays bounded. Invalid tokens
+# are never cached.
+_user_cache = TTLCache(maxsize=5000, ttl=60)  # token key -> (deadline, User)
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+def _evict_user_tokens(user_id: str):
+    for key in [k for k, (_, u) in _user_cache.items() if u.user_id == user_id]:
+        _user_cache.pop(key, None)
+
 async def get_current_user(request: Request) -> User:
     # Check cookie first
     token = request.cookies.get('session_token')
@@ -241,39 +273,59 @@ async def get_current_user(request: Request) -> User:
     
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
-    
+
+    # Cache hit: skip HMAC verify + Mongo round-trip
+    cache_key = _token_cache_key(token)
+    cached = _user_cache.get(cache_key)
+    if cached:
+        deadline, cached_user = cached
+        if deadline > datetime.now(timezone.utc):
+            return cached_user
+        _user_cache.pop(cache_key, None)
+
     try:
         # Try JWT token first
+        token_exp = None
         try:
             payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
             user_id = payload.get('user_id')
             if not user_id:
                 raise HTTPException(status_code=401, detail="Invalid token")
+            token_exp = datetime.fromtimestamp(payload['exp'], tz=timezone.utc)
         except jwt.InvalidTokenError:
             # Try Google OAuth session
-            session_doc = await db.user_sessions.find_one({'session_token': token}, {'_id': 0})
+            # The expires_at predicate is answered by the session index, and
+            # Mongo's TTL monitor (see create_indexes) reaps expired sessions
+            # on its own, so no Python-side expiry bookkeeping is needed
+            session_doc = await db.user_sessions.find_one(
+                {'session_token': token, 'expires_at': {'$gt': datetime.now(timezone.utc)}},
+                {'_id': 0, 'user_id': 1, 'expires_at': 1}
+            )
             if not session_doc:
                 raise HTTPException(status_code=401, detail="Session not found")
-            
-            expires_at = session_doc['expires_at']
-            if isinstance(expires_at, str):
-                expires_at = datetime.fromisoformat(expires_at)
-            if expires_at.tzinfo is None:
-                expires_at = expires_at.replace(tzinfo=timezone.utc)
-            
-            if expires_at < datetime.now(timezone.utc):
-                raise HTTPException(status_code=401, detail="Session expired")
-            
+
             user_id = session_doc['user_id']
-        
+            token_exp = session_doc['expires_at']
+            if token_exp.tzinfo is None:
+                token_exp = token_exp.replace(tzinfo=timezone.utc)
+
         user_doc = await db.users.find_one({'user_id': user_id}, {'_id': 0})
         if not user_doc:
             raise HTTPException(status_code=401, detail="User not found")
-        
-        if isinstance(user_doc['created_at'], str):
-            user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
-        
-        return User(**user_doc)
+
+        # Trusted DB document — skip pydantic validation on the hot path
+        user = User.model_construct(**user_doc)
+
+        # Cache the verified token, clamping the entry's lifetime to the
+        # token's own expiry so we never serve a token past its exp claim
+        now = datetime.now(timezone.utc)
+        deadline = now + timedelta(seconds=_user_cache.ttl)
+        if token_exp is not None and token_exp < deadline:
+            deadline = token_exp
+        if deadline > now:
+            _user_cache[cache_key] = (deadline, user)
+
+        return user
     except Exception as e:
         logger.error(f"Auth error: {e}")
         raise HTTPException(status_code=401, detail="Invalid authentication")
@@ -287,12 +339,15 @@ async def require_role(user: User, allowed_roles: List[str]):
 @api_router.post("/auth/register", response_model=TokenResponse)
 async def register(user_data: UserCreate):
     # Check if user exists
-    existing = await db.users.find_one({'email': user_data.email})
+    existing = await db.users.find_one({'email': user_data.email}, {'_id': 1})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # Hash password
-    password_hash = bcrypt.hashpw(user_data.password.encode('utf-8'), bcrypt.gensalt())
+    # Hash password off the event loop: bcrypt is CPU-bound and would
+    # otherwise block every other coroutine for the duration of the hash
+    password_hash = await run_in_threadpool(
+        bcrypt.hashpw, user_data.password.encode('utf-8'), bcrypt.gensalt()
+    )
     
     # Create user
     user_id = f"user_{uuid.uuid4().hex[:12]}"
@@ -302,7 +357,7 @@ async def register(user_data: UserCreate):
         'name': user_data.name,
         'password_hash': password_hash.decode('utf-8'),
         'role': user_data.role,
-        'created_at': datetime.now(timezone.utc).isoformat()
+        'created_at': datetime.now(timezone.utc)
     }
     await db.users.insert_one(user_doc)
     
@@ -318,7 +373,7 @@ async def register(user_data: UserCreate):
         email=user_data.email,
         name=user_data.name,
         role=user_data.role,
-        created_at=datetime.fromisoformat(user_doc['created_at'])
+        created_at=user_doc['created_at']
     )
     
     return TokenResponse(token=token, user=user)
@@ -329,8 +384,13 @@ async def login(credentials: UserLogin):
     if not user_doc:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    # Verify password
-    if not bcrypt.checkpw(credentials.password.encode('utf-8'), user_doc['password_hash'].encode('utf-8')):
+    # Verify password off the event loop (bcrypt is CPU-bound)
+    password_ok = await run_in_threadpool(
+        bcrypt.checkpw,
+        credentials.password.encode('utf-8'),
+        user_doc['password_hash'].encode('utf-8')
+    )
+    if not password_ok:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Create token
@@ -345,7 +405,7 @@ async def login(credentials: UserLogin):
         email=user_doc['email'],
         name=user_doc['name'],
         role=user_doc['role'],
-        created_at=datetime.fromisoformat(user_doc['created_at']) if isinstance(user_doc['created_at'], str) else user_doc['created_at']
+        created_at=user_doc['created_at']
     )
     
     return TokenResponse(token=token, user=user)
@@ -361,15 +421,14 @@ async def google_auth_session(request: Request, response: Response):
         raise HTTPException(status_code=400, detail="Missing session ID")
     
     # Call Emergent Auth API
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            'https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data',
-            headers={'X-Session-ID': session_id}
-        )
-        if resp.status_code != 200:
-            raise HTTPException(status_code=401, detail="Invalid session")
-        
-        data = resp.json()
+    resp = await http_client.get(
+        'https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data',
+        headers={'X-Session-ID': session_id}
+    )
+    if resp.status_code != 200:
+        raise HTTPException(status_code=401, detail="Invalid session")
+
+    data = resp.json()
     
     # Create or update user
     user_doc = await db.users.find_one({'email': data['email']}, {'_id': 0})
@@ -387,7 +446,7 @@ async def google_auth_session(request: Request, response: Response):
             'name': data['name'],
             'picture': data.get('picture'),
             'role': 'employee',
-            'created_at': datetime.now(timezone.utc).isoformat()
+            'created_at': datetime.now(timezone.utc)
         }
         await db.users.insert_one(user_doc)
     
@@ -416,7 +475,7 @@ async def google_auth_session(request: Request, response: Response):
         email=data['email'],
         name=data['name'],
         role=user_doc.get('role', 'employee'),
-        created_at=datetime.fromisoformat(user_doc['created_at']) if isinstance(user_doc.get('created_at'), str) else user_doc.get('created_at', datetime.now(timezone.utc))
+        created_at=user_doc.get('created_at', datetime.now(timezone.utc))
     )
     
     return {'user': user}
@@ -425,20 +484,42 @@ async def google_auth_session(request: Request, response: Response):
 async def logout(response: Response, user: User = Depends(get_current_user)):
     # Delete session from DB
     await db.user_sessions.delete_many({'user_id': user.user_id})
-    
+
+    # Drop any cached tokens for this user so revocation takes effect
+    _evict_user_tokens(user.user_id)
+
     # Clear cookie
     response.delete_cookie('session_token', path='/')
     
     return {'message': 'Logged out successfully'}
 
+# ===== NAME LOOKUP CACHES =====
+
+# Categories, product types and suppliers change rarely but their names are
+# read on every product/order write. Cache the id -> name lookups in-process;
+# the category cache is invalidated by the update/delete endpoints below.
+
+@alru_cache(maxsize=2048)
+async def _category_name(category_id: str) -> Optional[str]:
+    doc = await db.categories.find_one({'category_id': category_id}, {'_id': 0, 'name': 1})
+    return doc['name'] if doc else None
+
+@alru_cache(maxsize=2048)
+async def _type_name(type_id: str) -> Optional[str]:
+    doc = await db.product_types.find_one({'type_id': type_id}, {'_id': 0, 'name': 1})
+    return doc['name'] if doc else None
+
+@alru_cache(maxsize=2048)
+async def _supplier_name(supplier_id: str) -> Optional[str]:
+    doc = await db.suppliers.find_one({'supplier_id': supplier_id}, {'_id': 0, 'name': 1})
+    return doc['name'] if doc else None
+
 # ===== CATEGORY ROUTES =====
 
 @api_router.get("/categories", response_model=List[Category])
-async def get_categories(user: User = Depends(get_current_user)):
-    categories = await db.categories.find({}, {'_id': 0}).to_list(1000)
-    for cat in categories:
-        if isinstance(cat['created_at'], str):
-            cat['created_at'] = datetime.fromisoformat(cat['created_at'])
+async def get_categories(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                         user: User = Depends(get_current_user)):
+    categories = await db.categories.find({}, {'_id': 0}).skip(skip).limit(limit).to_list(limit)
     return categories
 
 @api_router.post("/categories", response_model=Category)
@@ -450,7 +531,7 @@ async def create_category(category_data: CategoryCreate, user: User = Depends(ge
         'category_id': category_id,
         'name': category_data.name,
         'description': category_data.description,
-        'created_at': datetime.now(timezone.utc).isoformat()
+        'created_at': datetime.now(timezone.utc)
     }
     await db.categories.insert_one(category_doc)
     
@@ -458,7 +539,7 @@ async def create_category(category_data: CategoryCreate, user: User = Depends(ge
         category_id=category_id,
         name=category_data.name,
         description=category_data.description,
-        created_at=datetime.fromisoformat(category_doc['created_at'])
+        created_at=category_doc['created_at']
     )
 
 @api_router.put("/categories/{category_id}", response_model=Category)
@@ -472,10 +553,9 @@ async def update_category(category_id: str, category_data: CategoryCreate, user:
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Category not found")
     
+    _category_name.cache_invalidate(category_id)
     category_doc = await db.categories.find_one({'category_id': category_id}, {'_id': 0})
-    if isinstance(category_doc['created_at'], str):
-        category_doc['created_at'] = datetime.fromisoformat(category_doc['created_at'])
-    return Category(**category_doc)
+    return Category.model_construct(**category_doc)
 
 @api_router.delete("/categories/{category_id}")
 async def delete_category(category_id: str, user: User = Depends(get_current_user)):
@@ -485,19 +565,27 @@ async def delete_category(category_id: str, user: User = Depends(get_current_use
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Category not found")
     
+    _category_name.cache_invalidate(category_id)
     return {'message': 'Category deleted successfully'}
 
 # ===== PRODUCT TYPE ROUTES =====
 
+def _product_types_pipeline(skip: int, limit: int) -> List[Dict[str, Any]]:
+    # Single aggregation with $lookup instead of one categories.find_one per
+    # type; sort/paginate before the join so it only runs on the page returned
+    return [
+        {'$sort': {'created_at': -1}},
+        {'$skip': skip},
+        {'$limit': limit},
+        {'$lookup': {'from': 'categories', 'localField': 'category_id', 'foreignField': 'category_id', 'as': 'cat'}},
+        {'$addFields': {'category_name': {'$first': '$cat.name'}}},
+        {'$project': {'_id': 0, 'cat': 0}}
+    ]
+
 @api_router.get("/product-types", response_model=List[ProductType])
-async def get_product_types(user: User = Depends(get_current_user)):
-    types = await db.product_types.find({}, {'_id': 0}).to_list(1000)
-    for pt in types:
-        if isinstance(pt['created_at'], str):
-            pt['created_at'] = datetime.fromisoformat(pt['created_at'])
-        # Get category name
-        cat = await db.categories.find_one({'category_id': pt['category_id']}, {'_id': 0})
-        pt['category_name'] = cat['name'] if cat else None
+async def get_product_types(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                            user: User = Depends(get_current_user)):
+    types = await db.product_types.aggregate(_product_types_pipeline(skip, limit)).to_list(limit)
     return types
 
 @api_router.post("/product-types", response_model=ProductType)
@@ -509,48 +597,82 @@ async def create_product_type(type_data: ProductTypeCreate, user: User = Depends
         'type_id': type_id,
         'name': type_data.name,
         'category_id': type_data.category_id,
-        'created_at': datetime.now(timezone.utc).isoformat()
+        'created_at': datetime.now(timezone.utc)
     }
     await db.product_types.insert_one(type_doc)
     
-    cat = await db.categories.find_one({'category_id': type_data.category_id}, {'_id': 0})
+    category_name = await _category_name(type_data.category_id)
     
     return ProductType(
         type_id=type_id,
         name=type_data.name,
         category_id=type_data.category_id,
-        category_name=cat['name'] if cat else None,
-        created_at=datetime.fromisoformat(type_doc['created_at'])
+        category_name=category_name,
+        created_at=type_doc['created_at']
     )
 
 # ===== PRODUCT ROUTES =====
 
-@api_router.get("/products", response_model=List[Product])
-async def get_products(user: User = Depends(get_current_user)):
-    products = await db.products.find({}, {'_id': 0}).to_list(1000)
-    for prod in products:
-        if isinstance(prod['created_at'], str):
-            prod['created_at'] = datetime.fromisoformat(prod['created_at'])
-        
-        # Get category and type names
-        cat = await db.categories.find_one({'category_id': prod['category_id']}, {'_id': 0})
-        prod['category_name'] = cat['name'] if cat else None
-        
-        ptype = await db.product_types.find_one({'type_id': prod['type_id']}, {'_id': 0})
-        prod['type_name'] = ptype['name'] if ptype else None
-        
-        # Get current stock
-        inventory = await db.inventory.find_one({'product_id': prod['product_id']}, {'_id': 0})
-        prod['current_stock'] = inventory['quantity'] if inventory else 0
-    
+def _products_pipeline(skip: int, limit: int) -> List[Dict[str, Any]]:
+    # Join category/type names and stock server-side in one aggregation
+    # instead of three find_one round-trips per product; sort/paginate
+    # before the $lookup stages so the joins only run on the page returned
+    return [
+        {'$sort': {'created_at': -1}},
+        {'$skip': skip},
+        {'$limit': limit},
+        {'$lookup': {'from': 'categories', 'localField': 'category_id', 'foreignField': 'category_id', 'as': 'cat'}},
+        {'$lookup': {'from': 'product_types', 'localField': 'type_id', 'foreignField': 'type_id', 'as': 'pt'}},
+        {'$lookup': {'from': 'inventory', 'localField': 'product_id', 'foreignField': 'product_id', 'as': 'inv'}},
+        {'$addFields': {
+            'category_name': {'$first': '$cat.name'},
+            'type_name': {'$first': '$pt.name'},
+            'current_stock': {'$ifNull': [{'$first': '$inv.quantity'}, 0]}
+        }},
+        {'$project': {'_id': 0, 'cat': 0, 'pt': 0, 'inv': 0}}
+    ]
+
+@api_router.get("/products")
+async def get_products(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                       user: User = Depends(get_current_user)):
+    # The pipeline already shapes documents like Product; with no
+    # response_model they go straight to the orjson default response
+    products = await db.products.aggregate(_products_pipeline(skip, limit)).to_list(limit)
     return products
 
+# ===== BOOTSTRAP =====
+
+# The products page loads categories, product types, suppliers and products
+# together; one endpoint serving all four in a single round-trip replaces
+# four sequential API calls from the frontend. Cached briefly so bursts of
+# page loads share one set of queries.
+_bootstrap_cache = TTLCache(maxsize=1, ttl=10)
+
+@api_router.get("/bootstrap")
+async def get_bootstrap(user: User = Depends(get_current_user)):
+    data = _bootstrap_cache.get('data')
+    if data is None:
+        categories, types, suppliers, products = await asyncio.gather(
+            db.categories.find({}, {'_id': 0}).to_list(1000),
+            db.product_types.aggregate(_product_types_pipeline(0, 1000)).to_list(1000),
+            db.suppliers.find({}, {'_id': 0}).to_list(1000),
+            db.products.aggregate(_products_pipeline(0, 100)).to_list(100)
+        )
+        data = {
+            'categories': categories,
+            'product_types': types,
+            'suppliers': suppliers,
+            'products': products
+        }
+        _bootstrap_cache['data'] = data
+    return data
+
 @api_router.post("/products", response_model=Product)
 async def create_product(product_data: ProductCreate, user: User = Depends(get_current_user)):
     await require_role(user, ['manager', 'admin'])
     
     # Check if SKU already exists
-    existing = await db.products.find_one({'sku': product_data.sku})
+    existing = await db.products.find_one({'sku': product_data.sku}, {'_id': 1})
     if existing:
         raise HTTPException(status_code=400, detail="SKU already exists")
     
@@ -562,7 +684,7 @@ async def create_product(product_data: ProductCreate, user: User = Depends(get_c
         'category_id': product_data.category_id,
         'type_id': product_data.type_id,
         'status': product_data.status,
-        'created_at': datetime.now(timezone.utc).isoformat()
+        'created_at': datetime.now(timezone.utc)
     }
     await db.products.insert_one(product_doc)
     
@@ -573,20 +695,20 @@ async def create_product(product_data: ProductCreate, user: User = Depends(get_c
         'last_updated': datetime.now(timezone.utc)
     })
     
-    cat = await db.categories.find_one({'category_id': product_data.category_id}, {'_id': 0})
-    ptype = await db.product_types.find_one({'type_id': product_data.type_id}, {'_id': 0})
+    category_name = await _category_name(product_data.category_id)
+    type_name = await _type_name(product_data.type_id)
     
     return Product(
         product_id=product_id,
         sku=product_data.sku,
         name=product_data.name,
         category_id=product_data.category_id,
-        category_name=cat['name'] if cat else None,
+        category_name=category_name,
         type_id=product_data.type_id,
-        type_name=ptype['name'] if ptype else None,
+        type_name=type_name,
         status=product_data.status,
         current_stock=0,
-        created_at=datetime.fromisoformat(product_doc['created_at'])
+        created_at=product_doc['created_at']
     )
 
 @api_router.put("/products/{product_id}", response_model=Product)
@@ -607,27 +729,20 @@ async def update_product(product_id: str, product_data: ProductCreate, user: Use
         raise HTTPException(status_code=404, detail="Product not found")
     
     product_doc = await db.products.find_one({'product_id': product_id}, {'_id': 0})
-    if isinstance(product_doc['created_at'], str):
-        product_doc['created_at'] = datetime.fromisoformat(product_doc['created_at'])
-    
-    cat = await db.categories.find_one({'category_id': product_doc['category_id']}, {'_id': 0})
-    ptype = await db.product_types.find_one({'type_id': product_doc['type_id']}, {'_id': 0})
-    inventory = await db.inventory.find_one({'product_id': product_id}, {'_id': 0})
     
-    product_doc['category_name'] = cat['name'] if cat else None
-    product_doc['type_name'] = ptype['name'] if ptype else None
+    product_doc['category_name'] = await _category_name(product_doc['category_id'])
+    product_doc['type_name'] = await _type_name(product_doc['type_id'])
+    inventory = await db.inventory.find_one({'product_id': product_id}, {'_id': 0, 'quantity': 1})
     product_doc['current_stock'] = inventory['quantity'] if inventory else 0
     
-    return Product(**product_doc)
+    return Product.model_construct(**product_doc)
 
 # ===== SUPPLIER ROUTES =====
 
 @api_router.get("/suppliers", response_model=List[Supplier])
-async def get_suppliers(user: User = Depends(get_current_user)):
-    suppliers = await db.suppliers.find({}, {'_id': 0}).to_list(1000)
-    for sup in suppliers:
-        if isinstance(sup['created_at'], str):
-            sup['created_at'] = datetime.fromisoformat(sup['created_at'])
+async def get_suppliers(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                        user: User = Depends(get_current_user)):
+    suppliers = await db.suppliers.find({}, {'_id': 0}).skip(skip).limit(limit).to_list(limit)
     return suppliers
 
 @api_router.post("/suppliers", response_model=Supplier)
@@ -643,106 +758,118 @@ async def create_supplier(supplier_data: SupplierCreate, user: User = Depends(ge
         'email': supplier_data.email,
         'address': supplier_data.address,
         'has_vat': supplier_data.has_vat,
-        'created_at': datetime.now(timezone.utc).isoformat()
+        'created_at': datetime.now(timezone.utc)
     }
     await db.suppliers.insert_one(supplier_doc)
     
-    return Supplier(**{**supplier_doc, 'created_at': datetime.fromisoformat(supplier_doc['created_at'])})
+    return Supplier.model_construct(**supplier_doc)
 
 # ===== PURCHASE ORDER ROUTES =====
 
-@api_router.get("/purchase-orders", response_model=List[PurchaseOrder])
-async def get_purchase_orders(user: User = Depends(get_current_user)):
-    orders = await db.purchase_orders.find({}, {'_id': 0}).to_list(1000)
-    for order in orders:
-        if isinstance(order['date'], str):
-            order['date'] = datetime.fromisoformat(order['date'])
-        if isinstance(order['created_at'], str):
-            order['created_at'] = datetime.fromisoformat(order['created_at'])
-        
-        # Get supplier name
-        supplier = await db.suppliers.find_one({'supplier_id': order['supplier_id']}, {'_id': 0})
-        order['supplier_name'] = supplier['name'] if supplier else None
-    
+@api_router.get("/purchase-orders")
+async def get_purchase_orders(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                              user: User = Depends(get_current_user)):
+    # Join supplier names server-side instead of one find_one per order
+    # Sort/paginate before the $lookup so the join only runs on the page
+    # being returned
+    pipeline = [
+        {'$sort': {'date': -1}},
+        {'$skip': skip},
+        {'$limit': limit},
+        {'$lookup': {'from': 'suppliers', 'localField': 'supplier_id', 'foreignField': 'supplier_id', 'as': 'sup'}},
+        {'$addFields': {'supplier_name': {'$first': '$sup.name'}}},
+        {'$project': {'_id': 0, 'sup': 0}}
+    ]
+    # Documents already match the PurchaseOrder shape; skip the per-row
+    # response-model re-validation and let orjson encode them directly
+    orders = await db.purchase_orders.aggregate(pipeline).to_list(limit)
     return orders
 
 @api_router.post("/purchase-orders", response_model=PurchaseOrder)
 async def create_purchase_order(order_data: PurchaseOrderCreate, user: User = Depends(get_current_user)):
     await require_role(user, ['manager', 'admin'])
-    
+
+    now = datetime.now(timezone.utc)
+
     # Calculate totals
     total_amount = sum(item.quantity * item.unit_price for item in order_data.items)
-    
-    # Get product names
-    items_with_names = []
-    for item in order_data.items:
-        product = await db.products.find_one({'product_id': item.product_id}, {'_id': 0})
-        items_with_names.append({
+
+    # Get product names (lookups are independent, run them concurrently)
+    products = await asyncio.gather(
+        *[db.products.find_one({'product_id': item.product_id}, {'_id': 0, 'name': 1}) for item in order_data.items]
+    )
+    items_with_names = [
+        {
             'product_id': item.product_id,
             'product_name': product['name'] if product else None,
             'quantity': item.quantity,
             'unit_price': item.unit_price,
             'total': item.quantity * item.unit_price
-        })
-    
+        }
+        for item, product in zip(order_data.items, products)
+    ]
+
     po_id = f"po_{uuid.uuid4().hex[:12]}"
     po_doc = {
         'po_id': po_id,
         'supplier_id': order_data.supplier_id,
-        'date': order_data.date.isoformat(),
+        'date': order_data.date,
         'items': items_with_names,
         'total_amount': total_amount,
         'payment_status': 'unpaid',
         'paid_amount': 0,
         'created_by': user.user_id,
-        'created_at': datetime.now(timezone.utc).isoformat()
+        'created_at': now
     }
-    await db.purchase_orders.insert_one(po_doc)
-    
-    # Update inventory
-    for item in order_data.items:
-        await db.inventory.update_one(
+    # All inventory increments go to Mongo as a single batched command
+    # instead of one update_one round-trip per item
+    inventory_ops = [
+        UpdateOne(
             {'product_id': item.product_id},
-            {'$inc': {'quantity': item.quantity}, '$set': {'last_updated': datetime.now(timezone.utc)}},
+            {'$inc': {'quantity': item.quantity}, '$set': {'last_updated': now}},
             upsert=True
         )
-    
-    # Create transaction
-    await db.transactions.insert_one({
-        'transaction_id': f"txn_{uuid.uuid4().hex[:12]}",
-        'date': order_data.date,
-        'type': 'expense',
-        'category': 'purchase',
-        'amount': total_amount,
-        'description': f"Purchase order {po_id}",
-        'related_to': po_id,
-        'created_by': user.user_id,
-        'created_at': datetime.now(timezone.utc)
-    })
-    
-    supplier = await db.suppliers.find_one({'supplier_id': order_data.supplier_id}, {'_id': 0})
-    
+        for item in order_data.items
+    ]
+
+    # The PO insert, inventory updates, transaction insert and supplier
+    # lookup are all independent — overlap their round-trips
+    _, _, _, supplier_name = await asyncio.gather(
+        db.purchase_orders.insert_one(po_doc),
+        db.inventory.bulk_write(inventory_ops, ordered=False),
+        db.transactions.insert_one({
+            'transaction_id': f"txn_{uuid.uuid4().hex[:12]}",
+            'date': order_data.date,
+            'type': 'expense',
+            'category': 'purchase',
+            'amount': total_amount,
+            'description': f"Purchase order {po_id}",
+            'related_to': po_id,
+            'created_by': user.user_id,
+            'created_at': now
+        }),
+        _supplier_name(order_data.supplier_id)
+    )
+
     return PurchaseOrder(
         po_id=po_id,
         supplier_id=order_data.supplier_id,
-        supplier_name=supplier['name'] if supplier else None,
+        supplier_name=supplier_name,
         date=order_data.date,
-        items=[PurchaseOrderItem(**item) for item in items_with_names],
+        items=[PurchaseOrderItem.model_construct(**item) for item in items_with_names],
         total_amount=total_amount,
         payment_status='unpaid',
         paid_amount=0,
         created_by=user.user_id,
-        created_at=datetime.fromisoformat(po_doc['created_at'])
+        created_at=po_doc['created_at']
     )
 
 # ===== CUSTOMER ROUTES =====
 
 @api_router.get("/customers", response_model=List[Customer])
-async def get_customers(user: User = Depends(get_current_user)):
-    customers = await db.customers.find({}, {'_id': 0}).to_list(1000)
-    for cust in customers:
-        if isinstance(cust['created_at'], str):
-            cust['created_at'] = datetime.fromisoformat(cust['created_at'])
+async def get_customers(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                        user: User = Depends(get_current_user)):
+    customers = await db.customers.find({}, {'_id': 0}).skip(skip).limit(limit).to_list(limit)
     return customers
 
 @api_router.post("/customers", response_model=Customer)
@@ -756,37 +883,47 @@ async def create_customer(customer_data: CustomerCreate, user: User = Depends(ge
         'address': customer_data.address,
         'group': customer_data.group,
         'notes': customer_data.notes,
-        'created_at': datetime.now(timezone.utc).isoformat()
+        'created_at': datetime.now(timezone.utc)
     }
     await db.customers.insert_one(customer_doc)
     
-    return Customer(**{**customer_doc, 'created_at': datetime.fromisoformat(customer_doc['created_at'])})
+    return Customer.model_construct(**customer_doc)
 
 # ===== SALES ORDER ROUTES =====
 
-@api_router.get("/sales-orders", response_model=List[SalesOrder])
-async def get_sales_orders(user: User = Depends(get_current_user)):
-    orders = await db.sales_orders.find({}, {'_id': 0}).to_list(1000)
-    for order in orders:
-        if isinstance(order['date'], str):
-            order['date'] = datetime.fromisoformat(order['date'])
-        if isinstance(order['created_at'], str):
-            order['created_at'] = datetime.fromisoformat(order['created_at'])
-        
-        if order.get('customer_id'):
-            customer = await db.customers.find_one({'customer_id': order['customer_id']}, {'_id': 0})
-            order['customer_name'] = customer['name'] if customer else None
-    
+@api_router.get("/sales-orders")
+async def get_sales_orders(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                           user: User = Depends(get_current_user)):
+    # Join customer names server-side instead of one find_one per order
+    # Sort/paginate before the $lookup so the join only runs on the page
+    # being returned
+    pipeline = [
+        {'$sort': {'date': -1}},
+        {'$skip': skip},
+        {'$limit': limit},
+        {'$lookup': {'from': 'customers', 'localField': 'customer_id', 'foreignField': 'customer_id', 'as': 'cust'}},
+        {'$addFields': {'customer_name': {'$first': '$cust.name'}}},
+        {'$project': {'_id': 0, 'cust': 0}}
+    ]
+    # Documents already match the SalesOrder shape; skip the per-row
+    # response-model re-validation and let orjson encode them directly
+    orders = await db.sales_orders.aggregate(pipeline).to_list(limit)
     return orders
 
 @api_router.post("/sales-orders", response_model=SalesOrder)
 async def create_sales_order(order_data: SalesOrderCreate, user: User = Depends(get_current_user)):
-    # Check stock availability
+    now = datetime.now(timezone.utc)
+
+    # Fast-fail stock check with a single $in query. This is advisory only —
+    # the conditional decrements below are what actually guarantee we never
+    # over-sell under concurrent orders.
+    item_ids = [item.product_id for item in order_data.items]
+    stock_rows = await db.inventory.find({'product_id': {'$in': item_ids}}, {'_id': 0}).to_list(len(item_ids))
+    stock = {row['product_id']: row['quantity'] for row in stock_rows}
     for item in order_data.items:
-        inventory = await db.inventory.find_one({'product_id': item.product_id}, {'_id': 0})
-        current_stock = inventory['quantity'] if inventory else 0
+        current_stock = stock.get(item.product_id, 0)
         if current_stock < item.quantity:
-            product = await db.products.find_one({'product_id': item.product_id}, {'_id': 0})
+            product = await db.products.find_one({'product_id': item.product_id}, {'_id': 0, 'name': 1})
             raise HTTPException(
                 status_code=400,
                 detail=f"Insufficient stock for {product['name'] if product else item.product_id}. Available: {current_stock}"
@@ -794,112 +931,163 @@ async def create_sales_order(order_data: SalesOrderCreate, user: User = Depends(
     
     # Calculate totals
     total_amount = sum(item.quantity * item.unit_price for item in order_data.items)
-    
-    # Get product names
-    items_with_names = []
-    for item in order_data.items:
-        product = await db.products.find_one({'product_id': item.product_id}, {'_id': 0})
-        items_with_names.append({
+
+    # Get product names (lookups are independent, run them concurrently)
+    products = await asyncio.gather(
+        *[db.products.find_one({'product_id': item.product_id}, {'_id': 0, 'name': 1}) for item in order_data.items]
+    )
+    items_with_names = [
+        {
             'product_id': item.product_id,
             'product_name': product['name'] if product else None,
             'quantity': item.quantity,
             'unit_price': item.unit_price,
             'total': item.quantity * item.unit_price
-        })
-    
+        }
+        for item, product in zip(order_data.items, products)
+    ]
+
     order_id = f"so_{uuid.uuid4().hex[:12]}"
     so_doc = {
         'order_id': order_id,
         'customer_id': order_data.customer_id,
-        'date': order_data.date.isoformat(),
+        'date': order_data.date,
         'order_type': order_data.order_type,
         'items': items_with_names,
         'total_amount': total_amount,
         'payment_status': 'unpaid',
         'paid_amount': 0,
         'created_by': user.user_id,
-        'created_at': datetime.now(timezone.utc).isoformat()
+        'created_at': now
     }
-    await db.sales_orders.insert_one(so_doc)
-    
-    # Update inventory
-    for item in order_data.items:
-        await db.inventory.update_one(
-            {'product_id': item.product_id},
-            {'$inc': {'quantity': -item.quantity}, '$set': {'last_updated': datetime.now(timezone.utc)}}
+    # Atomically decrement stock before recording the order. The quantity
+    # guard in the filter makes the check-and-decrement a single operation,
+    # so two concurrent orders can never both take the last units.
+    results = await asyncio.gather(*[
+        db.inventory.update_one(
+            {'product_id': item.product_id, 'quantity': {'$gte': item.quantity}},
+            {'$inc': {'quantity': -item.quantity}, '$set': {'last_updated': now}}
         )
-    
-    # Create transaction
-    await db.transactions.insert_one({
-        'transaction_id': f"txn_{uuid.uuid4().hex[:12]}",
-        'date': order_data.date,
-        'type': 'income',
-        'category': 'sales',
-        'amount': total_amount,
-        'description': f"Sales order {order_id}",
-        'related_to': order_id,
-        'created_by': user.user_id,
-        'created_at': datetime.now(timezone.utc)
-    })
-    
-    customer_name = None
-    if order_data.customer_id:
-        customer = await db.customers.find_one({'customer_id': order_data.customer_id}, {'_id': 0})
-        customer_name = customer['name'] if customer else None
-    
+        for item in order_data.items
+    ])
+    failed = [item for item, res in zip(order_data.items, results) if res.modified_count == 0]
+    if failed:
+        # Roll back the decrements that did apply, then report the first failure
+        applied = [item for item, res in zip(order_data.items, results) if res.modified_count > 0]
+        if applied:
+            await db.inventory.bulk_write(
+                [UpdateOne({'product_id': item.product_id}, {'$inc': {'quantity': item.quantity}})
+                 for item in applied],
+                ordered=False
+            )
+        item = failed[0]
+        inventory = await db.inventory.find_one({'product_id': item.product_id}, {'_id': 0, 'quantity': 1})
+        current_stock = inventory['quantity'] if inventory else 0
+        product = await db.products.find_one({'product_id': item.product_id}, {'_id': 0, 'name': 1})
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient stock for {product['name'] if product else item.product_id}. Available: {current_stock}"
+        )
+
+    # The order insert, transaction insert and customer lookup are all
+    # independent — overlap their round-trips
+    _, _, customer = await asyncio.gather(
+        db.sales_orders.insert_one(so_doc),
+        db.transactions.insert_one({
+            'transaction_id': f"txn_{uuid.uuid4().hex[:12]}",
+            'date': order_data.date,
+            'type': 'income',
+            'category': 'sales',
+            'amount': total_amount,
+            'description': f"Sales order {order_id}",
+            'related_to': order_id,
+            'created_by': user.user_id,
+            'created_at': now
+        }),
+        db.customers.find_one({'customer_id': order_data.customer_id}, {'_id': 0, 'name': 1})
+        if order_data.customer_id else asyncio.sleep(0)
+    )
+    customer_name = customer['name'] if customer else None
+
     return SalesOrder(
         order_id=order_id,
         customer_id=order_data.customer_id,
         customer_name=customer_name,
         date=order_data.date,
         order_type=order_data.order_type,
-        items=[SalesOrderItem(**item) for item in items_with_names],
+        items=[SalesOrderItem.model_construct(**item) for item in items_with_names],
         total_amount=total_amount,
         payment_status='unpaid',
         paid_amount=0,
         created_by=user.user_id,
-        created_at=datetime.fromisoformat(so_doc['created_at'])
+        created_at=so_doc['created_at']
     )
 
 # ===== INVENTORY ROUTES =====
 
-@api_router.get("/inventory", response_model=List[InventoryItem])
-async def get_inventory(user: User = Depends(get_current_user)):
-    inventory = await db.inventory.find({}, {'_id': 0}).to_list(1000)
-    for item in inventory:
-        product = await db.products.find_one({'product_id': item['product_id']}, {'_id': 0})
-        item['product_name'] = product['name'] if product else None
-        item['sku'] = product['sku'] if product else None
-        if isinstance(item['last_updated'], str):
-            item['last_updated'] = datetime.fromisoformat(item['last_updated'])
+@api_router.get("/inventory")
+async def get_inventory(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=500),
+                        user: User = Depends(get_current_user)):
+    # Join product name/sku server-side instead of one products.find_one
+    # per inventory row. Sort/skip/limit run before the $lookup so only
+    # the requested page gets joined; the inclusion-style $project keeps
+    # only the response fields, and skipping the response_model avoids
+    # re-validating every row of DB-owned data before serialization.
+    pipeline = [
+        {'$sort': {'product_id': 1}},
+        {'$skip': skip},
+        {'$limit': limit},
+        {'$lookup': {'from': 'products', 'localField': 'product_id', 'foreignField': 'product_id', 'as': 'p'}},
+        {'$project': {
+            '_id': 0,
+            'product_id': 1,
+            'product_name': {'$first': '$p.name'},
+            'sku': {'$first': '$p.sku'},
+            'quantity': 1,
+            'last_updated': 1
+        }}
+    ]
+    inventory = await db.inventory.aggregate(pipeline).to_list(limit)
     return inventory
 
 # ===== DASHBOARD ROUTES =====
 
 @api_router.get("/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_stats(user: User = Depends(get_current_user)):
-    # Calculate revenue
-    income_txns = await db.transactions.find({'type': 'income'}, {'_id': 0}).to_list(10000)
-    total_revenue = sum(txn['amount'] for txn in income_txns)
-    
-    # Calculate expenses
-    expense_txns = await db.transactions.find({'type': 'expense'}, {'_id': 0}).to_list(10000)
-    total_expenses = sum(txn['amount'] for txn in expense_txns)
-    
-    # Calculate profit
+    # The queries hit different collections and are independent, so run
+    # them concurrently — wall clock is the slowest query, not the sum.
+    # The $group aggregation sums revenue/expenses server-side instead of
+    # shipping every transaction to Python to add up.
+    # $facet collapses the total/pending order counts into one round trip,
+    # and $in on payment_status (unlike $ne) can walk its index.
+    totals, order_counts, low_stock, total_customers, total_suppliers = await asyncio.gather(
+        db.transactions.aggregate([
+            {'$group': {'_id': '$type', 'total': {'$sum': '$amount'}}}
+        ]).to_list(2),
+        db.sales_orders.aggregate([
+            {'$facet': {
+                'total': [{'$count': 'n'}],
+                'pending': [
+                    {'$match': {'payment_status': {'$in': ['unpaid', 'partial']}}},
+                    {'$count': 'n'}
+                ]
+            }}
+        ]).to_list(1),
+        db.inventory.count_documents({'quantity': {'$lt': 10}}),
+        # Unfiltered counts come straight from collection metadata
+        db.customers.estimated_document_count(),
+        db.suppliers.estimated_document_count()
+    )
+    sums = {row['_id']: row['total'] for row in totals}
+    total_revenue = sums.get('income', 0)
+    total_expenses = sums.get('expense', 0)
     total_profit = total_revenue - total_expenses
-    
-    # Count orders
-    total_orders = await db.sales_orders.count_documents({})
-    pending_orders = await db.sales_orders.count_documents({'payment_status': {'$ne': 'paid'}})
-    
-    # Low stock products (< 10)
-    low_stock = await db.inventory.count_documents({'quantity': {'$lt': 10}})
-    
-    # Count customers and suppliers
-    total_customers = await db.customers.count_documents({})
-    total_suppliers = await db.suppliers.count_documents({})
-    
+
+    # $count emits no document at all for an empty facet
+    facets = order_counts[0]
+    total_orders = facets['total'][0]['n'] if facets['total'] else 0
+    pending_orders = facets['pending'][0]['n'] if facets['pending'] else 0
+
     return DashboardStats(
         total_revenue=total_revenue,
         total_expenses=total_expenses,
@@ -913,130 +1101,147 @@ async def get_dashboard_stats(user: User = Depends(get_current_user)):
 
 # ===== REPORTS & EXPORT =====
 
+# Shared header styling: openpyxl style objects are immutable, so one set
+# serves every export instead of being rebuilt per request
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_FILL = PatternFill(start_color="24A853", end_color="24A853", fill_type="solid")
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+
 @api_router.post("/reports/export")
 async def export_report(query: ReportQuery, user: User = Depends(get_current_user)):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = query.report_type.capitalize()
-    
-    # Styling
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="24A853", end_color="24A853", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
+    # Write-only mode streams rows into the archive as they are appended
+    # instead of keeping every cell in memory, so peak RSS stays constant
+    # regardless of how many rows the report has
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(query.report_type.capitalize())
+
+    def header_row(titles):
+        cells = []
+        for title in titles:
+            cell = WriteOnlyCell(ws, value=title)
+            cell.font = HEADER_FONT
+            cell.fill = HEADER_FILL
+            cell.alignment = HEADER_ALIGNMENT
+            cells.append(cell)
+        return cells
+
+    def set_column_widths(widths):
+        # In write-only mode column dimensions must be set before any rows
+        # are appended
+        for idx, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(idx)].width = width
+
     if query.report_type == 'sales':
-        ws.append(['Order ID', 'Date', 'Customer', 'Type', 'Total Amount', 'Payment Status'])
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        orders = await db.sales_orders.find({
-            'date': {
-                '$gte': query.start_date.isoformat(),
-                '$lte': query.end_date.isoformat()
-            }
-        }, {'_id': 0}).to_list(10000)
-        
-        for order in orders:
-            customer_name = ''
-            if order.get('customer_id'):
-                customer = await db.customers.find_one({'customer_id': order['customer_id']}, {'_id': 0})
-                customer_name = customer['name'] if customer else ''
-            
+        set_column_widths([18, 28, 24, 12, 14, 16])
+        ws.append(header_row(['Order ID', 'Date', 'Customer', 'Type', 'Total Amount', 'Payment Status']))
+
+        date_filter = {'date': {'$gte': query.start_date, '$lte': query.end_date}}
+
+        # One $in batch fetch for all customer names instead of a find_one
+        # per order; distinct() collects the ids server-side so the orders
+        # themselves never need to be materialized
+        cust_ids = [c for c in await db.sales_orders.distinct('customer_id', date_filter) if c]
+        cust_map = {}
+        if cust_ids:
+            rows = await db.customers.find(
+                {'customer_id': {'$in': cust_ids}}, {'_id': 0, 'customer_id': 1, 'name': 1}
+            ).to_list(len(cust_ids))
+            cust_map = {c['customer_id']: c['name'] for c in rows}
+
+        # Stream the cursor instead of to_list(10000): rows are appended to
+        # the write-only sheet as each batch arrives, keeping memory O(batch)
+        async for order in db.sales_orders.find(date_filter, {'_id': 0}).batch_size(500):
             ws.append([
                 order['order_id'],
-                order['date'],
-                customer_name,
+                order['date'].replace(tzinfo=None),  # Excel cells must be tz-naive
+                cust_map.get(order.get('customer_id'), ''),
                 order['order_type'],
                 order['total_amount'],
                 order['payment_status']
             ])
     
     elif query.report_type == 'purchases':
-        ws.append(['PO ID', 'Date', 'Supplier', 'Total Amount', 'Payment Status'])
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        orders = await db.purchase_orders.find({
-            'date': {
-                '$gte': query.start_date.isoformat(),
-                '$lte': query.end_date.isoformat()
-            }
-        }, {'_id': 0}).to_list(10000)
-        
-        for order in orders:
-            supplier = await db.suppliers.find_one({'supplier_id': order['supplier_id']}, {'_id': 0})
-            
+        set_column_widths([18, 28, 24, 14, 16])
+        ws.append(header_row(['PO ID', 'Date', 'Supplier', 'Total Amount', 'Payment Status']))
+
+        date_filter = {'date': {'$gte': query.start_date, '$lte': query.end_date}}
+
+        # One $in batch fetch for all supplier names instead of a find_one
+        # per order
+        sup_ids = await db.purchase_orders.distinct('supplier_id', date_filter)
+        sup_map = {}
+        if sup_ids:
+            rows = await db.suppliers.find(
+                {'supplier_id': {'$in': sup_ids}}, {'_id': 0, 'supplier_id': 1, 'name': 1}
+            ).to_list(len(sup_ids))
+            sup_map = {s['supplier_id']: s['name'] for s in rows}
+
+        async for order in db.purchase_orders.find(date_filter, {'_id': 0}).batch_size(500):
             ws.append([
                 order['po_id'],
-                order['date'],
-                supplier['name'] if supplier else '',
+                order['date'].replace(tzinfo=None),  # Excel cells must be tz-naive
+                sup_map.get(order['supplier_id'], ''),
                 order['total_amount'],
                 order['payment_status']
             ])
     
     elif query.report_type == 'inventory':
-        ws.append(['Product ID', 'SKU', 'Product Name', 'Quantity', 'Last Updated'])
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        inventory = await db.inventory.find({}, {'_id': 0}).to_list(10000)
-        
-        for item in inventory:
-            product = await db.products.find_one({'product_id': item['product_id']}, {'_id': 0})
-            
+        set_column_widths([18, 16, 30, 10, 28])
+        ws.append(header_row(['Product ID', 'SKU', 'Product Name', 'Quantity', 'Last Updated']))
+
+        prod_ids = await db.inventory.distinct('product_id')
+        prod_map = {
+            p['product_id']: p
+            async for p in db.products.find(
+                {'product_id': {'$in': prod_ids}},
+                {'_id': 0, 'product_id': 1, 'name': 1, 'sku': 1}
+            )
+        }
+
+        async for item in db.inventory.find({}, {'_id': 0}).batch_size(500):
+            product = prod_map.get(item['product_id'])
             ws.append([
                 item['product_id'],
                 product['sku'] if product else '',
                 product['name'] if product else '',
                 item['quantity'],
-                item['last_updated']
+                item['last_updated'].replace(tzinfo=None)  # Excel cells must be tz-naive
             ])
     
-    # Adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save to BytesIO
-    output = BytesIO()
+    # Save to a spooled temp file so large workbooks spill to disk instead
+    # of ballooning memory, then stream it out in chunks
+    output = SpooledTemporaryFile(max_size=100 * 1024 * 1024)
     wb.save(output)
     output.seek(0)
-    
+
+    def iter_file(chunk_size=65536):
+        while True:
+            chunk = output.read(chunk_size)
+            if not chunk:
+                output.close()
+                break
+            yield chunk
+
     filename = f"{query.report_type}_report_{query.start_date.date()}_{query.end_date.date()}.xlsx"
-    
+
     return StreamingResponse(
-        output,
+        iter_file(),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
 # ===== USER MANAGEMENT (Admin only) =====
 
-@api_router.get("/users", response_model=List[User])
-async def get_users(user: User = Depends(get_current_user)):
+@api_router.get("/users")
+async def get_users(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=500),
+                    user: User = Depends(get_current_user)):
     await require_role(user, ['admin'])
-    
-    users = await db.users.find({}, {'_id': 0, 'password_hash': 0}).to_list(1000)
-    for u in users:
-        if isinstance(u['created_at'], str):
-            u['created_at'] = datetime.fromisoformat(u['created_at'])
+
+    # Inclusion projection: only ship the fields the UI renders, which also
+    # keeps password_hash out by construction rather than by exclusion.
+    users = await db.users.find(
+        {}, {'_id': 0, 'user_id': 1, 'email': 1, 'name': 1, 'role': 1, 'created_at': 1}
+    ).sort('created_at', -1).skip(skip).limit(limit).to_list(limit)
     return users
 
 @api_router.put("/users/{user_id}/role")
@@ -1057,14 +1262,52 @@ async def update_user_role(user_id: str, role: str, user: User = Depends(get_cur
 
 app.include_router(api_router)
 
+# Parsed once at import; an explicit origin list lets Starlette take its
+# fast exact-match path instead of treating every origin as allowed, and
+# naming the methods/headers keeps preflight responses minimal.
+CORS_ORIGINS = [o.strip() for o in os.environ.get('CORS_ORIGINS', '*').split(',') if o.strip()]
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "X-Session-ID"],
 )
 
+@app.on_event("startup")
+async def create_indexes():
+    # Every hot lookup key used by this module; without these each find_one
+    # is a full collection scan. The TTL index on expires_at lets Mongo
+    # reap expired OAuth sessions on its own.
+    await asyncio.gather(
+        db.users.create_index('email', unique=True),
+        db.users.create_index('user_id', unique=True),
+        db.user_sessions.create_index('session_token', unique=True),
+        db.user_sessions.create_index('expires_at', expireAfterSeconds=0),
+        db.categories.create_index('category_id', unique=True),
+        db.product_types.create_index('type_id', unique=True),
+        db.product_types.create_index('category_id'),
+        db.products.create_index('product_id', unique=True),
+        db.products.create_index('sku', unique=True),
+        db.suppliers.create_index('supplier_id', unique=True),
+        db.customers.create_index('customer_id', unique=True),
+        db.inventory.create_index('product_id', unique=True),
+        db.purchase_orders.create_index('po_id', unique=True),
+        db.purchase_orders.create_index([('date', -1)]),
+        db.sales_orders.create_index('order_id', unique=True),
+        db.sales_orders.create_index([('date', -1)]),
+        db.products.create_index([('status', 1), ('created_at', -1)]),
+        db.products.create_index([('created_at', -1)]),
+        db.product_types.create_index([('created_at', -1)]),
+        db.sales_orders.create_index('payment_status'),
+        db.transactions.create_index('type'),
+        # Partial index keeps the low-stock dashboard count scanning only
+        # the rows that can match
+        db.inventory.create_index('quantity', partialFilterExpression={'quantity': {'$lt': 10}}),
+    )
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await http_client.aclose()
     client.close()